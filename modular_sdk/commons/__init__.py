@@ -181,17 +181,13 @@ class DynamoDBJsonSerializer(SingletonMeta):
 
     @classmethod
     def serialize_model(cls, model: dict) -> dict:
-        return {
-            k: cls.serializer.serialize(v)
-            for k, v in model.items()
-        }
+        serialize = cls.serializer.serialize
+        return {k: serialize(v) for k, v in model.items()}
 
     @classmethod
     def deserialize_model(cls, model: dict) -> dict:
-        return {
-            k: cls.deserializer.deserialize(v)
-            for k, v in model.items()
-        }
+        deserialize = cls.deserializer.deserialize
+        return {k: deserialize(v) for k, v in model.items()}
 
 
 def deep_pop(dct: dict, to_pop: dict) -> None:
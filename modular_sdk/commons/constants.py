@@ -73,6 +73,11 @@ class Env(str, Enum):
     AWS_REGION = 'AWS_REGION'
     AWS_DEFAULT_REGION = 'AWS_DEFAULT_REGION'
     LOG_LEVEL = 'MODULAR_SDK_LOG_LEVEL', 'INFO'
+    MONGO_BATCH_SIZE = 'MODULAR_SDK_MONGO_BATCH_SIZE', '100'
+    MONGO_MAX_POOL_SIZE = 'MODULAR_SDK_MONGO_MAX_POOL_SIZE'
+    MONGO_COMPRESSORS = 'MODULAR_SDK_MONGO_COMPRESSORS'  # zstd,snappy,zlib
+    MONGO_APPNAME = 'MODULAR_SDK_MONGO_APPNAME', 'modular-sdk'
+    SETTINGS_CACHE_TTL_SECONDS = 'MODULAR_SDK_SETTINGS_CACHE_TTL_SECONDS', '30'
 
 
 REGION_ENV = Env.AWS_REGION.value
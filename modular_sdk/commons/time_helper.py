@@ -4,6 +4,8 @@ from typing import Optional
 
 from dateutil.parser import isoparse
 
+_UTC = timezone.utc
+
 
 def utc_datetime(_from: Optional[str] = None) -> datetime:
     """
@@ -13,8 +15,9 @@ def utc_datetime(_from: Optional[str] = None) -> datetime:
     :params _from: Optional[str]
     :returns: datetime
     """
-    obj = datetime.now(timezone.utc) if not _from else isoparse(_from)
-    return obj.astimezone(timezone.utc)
+    if not _from:
+        return datetime.now(_UTC)
+    return isoparse(_from).astimezone(_UTC)
 
 
 def utc_iso(_from: Optional[datetime] = None) -> str:
@@ -26,7 +29,9 @@ def utc_iso(_from: Optional[datetime] = None) -> str:
     :returns: str
     """
     obj = _from or utc_datetime()
-    return obj.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+    if obj.tzinfo is not _UTC:
+        obj = obj.astimezone(_UTC)
+    return obj.isoformat().replace('+00:00', 'Z')
 
 
 def java_timestamp() -> float:
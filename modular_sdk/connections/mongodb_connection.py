@@ -1,9 +1,12 @@
+import os
+import threading
 from typing import Optional
 
 from pymongo import MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 
+from modular_sdk.commons.constants import Env
 from modular_sdk.commons.helpers import replace_keys_in_dict
 
 
@@ -15,18 +18,57 @@ class MongoDBConnection:
         self._default_db_name = default_db_name
 
         self._client: Optional[MongoClient] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
         self._db_cache, self._collection_cache = {}, {}
 
     def _or_default(self, db_name: Optional[str]) -> str:
         return db_name or self._default_db_name
 
+    def _check_pid(self):
+        """
+        MongoClient must not be used in a process forked after it was
+        created, so the child process creates its own client
+        """
+        if self._pid is not None and self._pid != os.getpid():
+            self._client, self._pid = None, None
+            self._lock = threading.Lock()  # could be held while forking
+            self._db_cache.clear()
+            self._collection_cache.clear()
+
+    @staticmethod
+    def _client_options() -> dict:
+        options = {}
+        max_pool_size = Env.MONGO_MAX_POOL_SIZE.get()
+        if max_pool_size:
+            options['maxPoolSize'] = int(max_pool_size)
+        compressors = Env.MONGO_COMPRESSORS.get()
+        if compressors:
+            # zstd and snappy require zstandard and python-snappy installed
+            options['compressors'] = compressors
+        appname = Env.MONGO_APPNAME.get()
+        if appname:
+            options['appname'] = appname
+        return options
+
     @property
     def client(self) -> MongoClient:
-        if not self._client:
-            self._client = MongoClient(self._mongo_uri)
-        return self._client
+        self._check_pid()
+        client = self._client
+        if client is None:
+            # only the first access is locked so that concurrent threads
+            # do not open multiple connection pools
+            with self._lock:
+                client = self._client
+                if client is None:
+                    client = self._client = MongoClient(
+                        self._mongo_uri, **self._client_options()
+                    )
+                    self._pid = os.getpid()
+        return client
 
     def database(self, db_name: Optional[str] = None) -> Database:
+        self._check_pid()
         db_name = self._or_default(db_name)
         if db_name not in self._db_cache:
             self._db_cache[db_name] = self.client.get_database(name=db_name)
@@ -35,7 +77,7 @@ class MongoDBConnection:
     def collection(self, collection_name: str,
                    db_name: Optional[str] = None) -> Collection:
         db_name = self._or_default(db_name)
-        database = self.database(db_name)
+        database = self.database(db_name)  # checks pid before cache lookup
         _key = (db_name, collection_name)
         if _key not in self._collection_cache:
             self._collection_cache[_key] = database.get_collection(
@@ -1,21 +1,25 @@
 import base64
 import binascii
 import json
+import math
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import (Any, Optional, Dict, Sequence, Iterable, Text, Union,
-                    Iterator, Type, List)
+                    Iterator, Type, List, Set, Tuple, FrozenSet)
 
+from bson import ObjectId
 from dynamodb_json import json_util
 from dynamodb_json import json_util as dynamo_json
 from pynamodb import indexes
 from pynamodb import models
 from pynamodb.attributes import (MapAttribute, Attribute, UnicodeAttribute,
                                  NumberAttribute, ListAttribute,
-                                 BooleanAttribute, JSONAttribute)
+                                 BooleanAttribute, JSONAttribute,
+                                 AttributeContainer)
 from pynamodb.constants import BOOLEAN, NUMBER, LIST, MAP, \
-    NULL, STRING
-from pynamodb.exceptions import DoesNotExist, AttributeDeserializationError
+    NULL, STRING, ITEM
+from pynamodb.exceptions import AttributeDeserializationError
 from pynamodb.expressions.condition import Condition
 from pynamodb.expressions.update import Action
 from pynamodb.indexes import _M
@@ -125,7 +129,18 @@ class ModelEncoder(json.JSONEncoder):
     actions corrupt the item
     """
 
+    # exact type -> encoder for the most common leaves. Allows to skip
+    # hasattr() below which raises and swallows AttributeError internally
+    _types_to_encoders = {
+        datetime: lambda obj: utc_iso(_from=obj),
+        ObjectId: str,
+        bytes: str
+    }
+
     def default(self, obj):
+        encoder = self._types_to_encoders.get(type(obj))
+        if encoder:
+            return encoder(obj)
         if hasattr(obj, 'attribute_values'):
             return obj.attribute_values
         elif isinstance(obj, datetime):
@@ -136,6 +151,51 @@ class ModelEncoder(json.JSONEncoder):
         # return json.JSONEncoder.default(self, obj)
 
 
+def _number_to_attribute_value(value: Union[int, float]) -> Dict[str, Any]:
+    return {NUMBER: json.dumps(value)}
+
+
+def _int_to_attribute_value(value: int) -> Dict[str, Any]:
+    return {NUMBER: str(value)}
+
+
+def _float_to_attribute_value(value: float) -> Dict[str, Any]:
+    # repr is what json.dumps uses for finite floats. NaN and Infinity
+    # are left to json.dumps to keep their json spelling
+    if math.isfinite(value):
+        return {NUMBER: repr(value)}
+    return {NUMBER: json.dumps(value)}
+
+
+def _list_to_attribute_value(value: list) -> Dict[str, Any]:
+    # lists of strings or integers are the most common ones. Convert
+    # them without a call per item if all the items are of the same type
+    if len(value) >= 4:
+        _type = type(value[0])
+        if _type is str and all(type(v) is str for v in value):
+            return {LIST: [{STRING: v} for v in value]}
+        if _type is int and all(type(v) is int for v in value):
+            return {LIST: [{NUMBER: str(v)} for v in value]}
+    return {LIST: [json_to_attribute_value(v) for v in value]}
+
+
+def _map_to_attribute_value(value: dict) -> Dict[str, Any]:
+    return {MAP: {k: json_to_attribute_value(v) for k, v in value.items()}}
+
+
+# exact type -> converter. Subclasses of these types are resolved by
+# the isinstance chain in json_to_attribute_value
+_TYPES_TO_ATTRIBUTE_VALUE_CONVERTERS = {
+    type(None): lambda value: {NULL: True},
+    bool: lambda value: {BOOLEAN: value},
+    int: _int_to_attribute_value,
+    float: _float_to_attribute_value,
+    str: lambda value: {STRING: value},
+    list: _list_to_attribute_value,
+    dict: _map_to_attribute_value,
+}
+
+
 def json_to_attribute_value(value: Any) -> Dict[str, Any]:
     """
     Overrides the one from "pynamodb.util" to handle MongoDB specific
@@ -143,18 +203,18 @@ def json_to_attribute_value(value: Any) -> Dict[str, Any]:
     :param value:
     :return:
     """
-    if value is None:
-        return {NULL: True}
-    if value is True or value is False:
-        return {BOOLEAN: value}
+    converter = _TYPES_TO_ATTRIBUTE_VALUE_CONVERTERS.get(type(value))
+    if converter:
+        return converter(value)
+    # subclasses of builtins (bool cannot be subclassed) are handled below
     if isinstance(value, (int, float)):
-        return {NUMBER: json.dumps(value)}
+        return _number_to_attribute_value(value)
     if isinstance(value, str):
         return {STRING: value}
     if isinstance(value, list):
-        return {LIST: [json_to_attribute_value(v) for v in value]}
+        return _list_to_attribute_value(value)
     if isinstance(value, dict):
-        return {MAP: {k: json_to_attribute_value(v) for k, v in value.items()}}
+        return _map_to_attribute_value(value)
     # changed part below
     # In case we don't know how to convert an attribute, we just proxy it.
     # STRING is used because PynamoDB does nothing to change the value
@@ -164,6 +224,64 @@ def json_to_attribute_value(value: Any) -> Dict[str, Any]:
     # raise ValueError("Unknown value type: {}".format(type(value).__name__))
 
 
+def attributes_to_get_names(attributes_to_get: Iterable[Union[str, Attribute]]
+                            ) -> Union[Set[str], FrozenSet[str]]:
+    """
+    Returns the names of the given attributes as they are stored in DB
+    :param attributes_to_get: attributes or their names. A frozenset is
+    considered already resolved and returned as is
+    :return:
+    """
+    if isinstance(attributes_to_get, frozenset):
+        return attributes_to_get
+    return {
+        attr.attr_name if isinstance(attr, Attribute) else attr
+        for attr in attributes_to_get
+    }
+
+
+def _is_docker() -> bool:
+    """
+    Service mode is read from the environment on each call (it's a single
+    dict lookup) because Modular can set it after models are imported
+    """
+    return os.environ.get(MODULAR_SERVICE_MODE_ENV) == SERVICE_MODE_DOCKER
+
+
+@lru_cache(maxsize=None)
+def _python_to_dynamo_attrs(container: Type[AttributeContainer]
+                            ) -> Dict[str, str]:
+    """
+    Reversed AttributeContainer._dynamo_to_python_attrs. It does not change
+    after the class is created so it's built once per class
+    """
+    return {py_key: db_key
+            for db_key, py_key in container._dynamo_to_python_attrs.items()}
+
+
+@lru_cache(maxsize=None)
+def _model_attribute_names(model: Type[AttributeContainer]) -> FrozenSet[str]:
+    return frozenset(
+        attr.attr_name for attr in model.get_attributes().values()
+    )
+
+
+@lru_cache(maxsize=None)
+def _index_key_attributes(index: Type[indexes.Index]
+                          ) -> Tuple[Optional[Attribute], Optional[Attribute]]:
+    """
+    Hash and range key attributes of the given index. Index attributes
+    are collected when the class is created so they are looked up once
+    """
+    hash_key, range_key = None, None
+    for attr_cls in index.Meta.attributes.values():
+        if attr_cls.is_hash_key:
+            hash_key = attr_cls
+        elif attr_cls.is_range_key:
+            range_key = attr_cls
+    return hash_key, range_key
+
+
 class ABCMongoDBHandlerMixin:
     """
     Must NOT be inherited from :class:`abc.ABC` because it's used as a mixin
@@ -182,24 +300,33 @@ class ABCMongoDBHandlerMixin:
         cls._mongodb = None
 
 
+@lru_cache(maxsize=None)
+def _shared_mongodb_adapter(mongo_uri: str, db_name: Optional[str]):
+    """
+    One adapter (and so one MongoClient with its connection pool) for all
+    the models that use the same database
+    """
+    from modular_sdk.connections.mongodb_connection import MongoDBConnection
+    from modular_sdk.models.pynamodb_extension.pynamodb_to_pymongo_adapter \
+        import PynamoDBToPyMongoAdapter
+    return PynamoDBToPyMongoAdapter(
+        mongodb_connection=MongoDBConnection(mongo_uri, db_name)
+    )
+
+
 class ModularMongoDBHandlerMixin(ABCMongoDBHandlerMixin):
     @classmethod
     def mongodb_handler(cls):
-        if not cls._mongodb:
-            from modular_sdk.connections.mongodb_connection import \
-                MongoDBConnection
-            from modular_sdk.models.pynamodb_extension.pynamodb_to_pymongo_adapter \
-                import PynamoDBToPyMongoAdapter
+        adapter = cls._mongodb
+        if adapter is None:
             user = os.environ.get(PARAM_MONGO_USER)
             password = os.environ.get(PARAM_MONGO_PASSWORD)
             url = os.environ.get(PARAM_MONGO_URL)
             db = os.environ.get(PARAM_MONGO_DB_NAME)
-            cls._mongodb = PynamoDBToPyMongoAdapter(
-                mongodb_connection=MongoDBConnection(
-                    build_mongodb_uri(user, password, url), db
-                )
+            adapter = cls._mongodb = _shared_mongodb_adapter(
+                build_mongodb_uri(user, password, url), db
             )
-        return cls._mongodb
+        return adapter
 
 
 class RawBaseModel(models.Model):
@@ -224,23 +351,30 @@ class RawBaseModel(models.Model):
 
     @classproperty
     def is_docker(cls) -> bool:
-        return os.environ.get(MODULAR_SERVICE_MODE_ENV) == SERVICE_MODE_DOCKER
+        return _is_docker()
 
     @classmethod
     def get_nullable(cls, hash_key, range_key=None, attributes_to_get=None,
                      consistent_read=False):
         if cls.is_docker:
             return cls.mongodb_handler().get_nullable(
-                model_class=cls, hash_key=hash_key, sort_key=range_key)
-        try:
-            return cls.get(hash_key, range_key,
-                           attributes_to_get=attributes_to_get,
-                           consistent_read=consistent_read)
-        except DoesNotExist as e:
-            _LOG.debug(f'{cls.__name__} does not exist '
-                       f'with the following keys: hash_key={hash_key}, '
-                       f'range_key={range_key}: {e.msg}')
-            return
+                model_class=cls, hash_key=hash_key, sort_key=range_key,
+                attributes_to_get=attributes_to_get)
+        # the same as Model.get but without raising and catching
+        # DoesNotExist for a missing item
+        _hash_key, _range_key = cls._serialize_keys(hash_key, range_key)
+        data = cls._get_connection().get_item(
+            _hash_key,
+            range_key=_range_key,
+            consistent_read=consistent_read,
+            attributes_to_get=attributes_to_get
+        )
+        item_data = data.get(ITEM) if data else None
+        if item_data:
+            return cls.from_raw_data(item_data)
+        _LOG.debug('%s does not exist with the following keys: '
+                   'hash_key=%s, range_key=%s', cls.__name__, hash_key,
+                   range_key)
 
     def save(self, condition: Optional[Condition] = None,
              settings: OperationSettings = OperationSettings.default
@@ -306,7 +440,8 @@ class RawBaseModel(models.Model):
     ) -> _T:
         if cls.is_docker:
             return cls.mongodb_handler().get(
-                model_class=cls, hash_key=hash_key, range_key=range_key)
+                model_class=cls, hash_key=hash_key, range_key=range_key,
+                attributes_to_get=attributes_to_get)
         return super().get(hash_key, range_key, consistent_read,
                            attributes_to_get, settings)
 
@@ -360,7 +495,8 @@ class RawBaseModel(models.Model):
                 limit=limit,
                 last_evaluated_key=last_evaluated_key,
                 attributes_to_get=attributes_to_get,
-                scan_index_forward=scan_index_forward
+                scan_index_forward=scan_index_forward,
+                index_name=index_name
             )
         return super().query(hash_key, range_key_condition, filter_condition,
                              consistent_read, index_name, scan_index_forward,
@@ -434,6 +570,17 @@ class RawBaseModel(models.Model):
             #     model[key] = utc_iso(_from=value)
         return model
 
+    @classmethod
+    def mongo_fields(cls, attributes_to_get: Optional[List] = None
+                     ) -> Optional[FrozenSet[str]]:
+        """
+        Names of the fields that must be fetched from MongoDB to build
+        instances of this model. None means that whole documents are needed
+        """
+        if attributes_to_get:
+            return frozenset(attributes_to_get_names(attributes_to_get))
+        return _model_attribute_names(cls)
+
     @classmethod
     def from_json(cls, model_json: dict,
                   attributes_to_get: Optional[List] = None,
@@ -441,10 +588,7 @@ class RawBaseModel(models.Model):
         _id = model_json.pop('_id', None)
         instance = instance or cls()
         if attributes_to_get:
-            to_get = set(
-                attr.attr_name if isinstance(attr, Attribute) else attr
-                for attr in attributes_to_get
-            )
+            to_get = attributes_to_get_names(attributes_to_get)
             model_json = {k: v for k, v in model_json.items() if k in to_get}
 
         attribute_values = {k: json_to_attribute_value(v) for k, v in
@@ -465,17 +609,9 @@ class RawBaseModel(models.Model):
         if not attr_values or (isinstance(item, MapAttribute) and type(item)
                                == MapAttribute):
             return attr_values
-        processed_item = {}
-        for attr_value_key in attr_values.keys():
-            py_to_ddb = {py_key: db_key
-                         for db_key, py_key in
-                         item._dynamo_to_python_attrs.items()}
-            match = py_to_ddb.get(attr_value_key)
-            if match:
-                processed_item[match] = attr_values[attr_value_key]
-            else:
-                processed_item[attr_value_key] = attr_values[attr_value_key]
-        return processed_item
+        py_to_ddb = _python_to_dynamo_attrs(type(item))
+        return {py_to_ddb.get(key) or key: value
+                for key, value in attr_values.items()}
 
     def __repr__(self):
         return str(self.__dict__)
@@ -484,7 +620,14 @@ class RawBaseModel(models.Model):
 class RawBaseGSI(indexes.GlobalSecondaryIndex):
     @classproperty
     def is_docker(cls) -> bool:
-        return os.environ.get(MODULAR_SERVICE_MODE_ENV) == SERVICE_MODE_DOCKER
+        return _is_docker()
+
+    @classmethod
+    def _hash_key_attribute(cls) -> Attribute:
+        """
+        Returns the attribute class for the hash key
+        """
+        return _index_key_attributes(cls)[0]
 
     @classmethod
     def _range_key_attribute(cls) -> Attribute:
@@ -492,9 +635,7 @@ class RawBaseGSI(indexes.GlobalSecondaryIndex):
         Returns the attribute class for the range key.
         One may wonder why PynamoDB 5.2.1 does not have this method...
         """
-        for attr_cls in cls.Meta.attributes.values():
-            if attr_cls.is_range_key:
-                return attr_cls
+        return _index_key_attributes(cls)[1]
 
     @classmethod
     def mongodb_handler(cls):
@@ -1,7 +1,9 @@
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, FrozenSet, Type
 
 from pynamodb import models
-from pynamodb.attributes import Attribute, MapAttribute, ListAttribute
+from pynamodb.attributes import Attribute, MapAttribute, ListAttribute, \
+    AttributeContainer
 
 from modular_sdk.commons import DynamoDBJsonSerializer
 from modular_sdk.commons.log_helper import get_logger
@@ -12,6 +14,18 @@ NULL = 'NULL'
 _LOG = get_logger(__name__)
 
 
+@lru_cache(maxsize=None)
+def _name_to_attribute(container: Type[AttributeContainer]
+                       ) -> Dict[str, Attribute]:
+    """
+    DB attribute names to attributes of the given model or map attribute.
+    They do not change after the class is created so it's built once
+    """
+    return {
+        attr.attr_name: attr for attr in container.get_attributes().values()
+    }
+
+
 class BaseSafeUpdateModel(BaseModel):
     """
     Allows not to override existing attributes that are not specified
@@ -21,13 +35,14 @@ class BaseSafeUpdateModel(BaseModel):
 
     @classmethod
     def _retrieve_additional_data(cls, document: dict,
-                                  attributes: Dict[str, Attribute]) -> dict:
+                                  container: Type[AttributeContainer]
+                                  ) -> dict:
         """
         Additional data represents those attributes that are not defined
         in Python model, but the do exist in DB. It includes all the nested
         mappings and lists of mappings
         :param document: raw data from DynamoDB
-        :param attributes: result of instance.get_attributes()
+        :param container: model or map attribute class the document belongs to
         :return:
         {
             "not_defined_attr": "value",
@@ -43,32 +58,34 @@ class BaseSafeUpdateModel(BaseModel):
             ]
         }
         """
-        name_to_instance = {
-            attr.attr_name: attr for attr in attributes.values()
-        }
-        additional_data = {}
-        for key, value in document.items():
-            if key not in name_to_instance:  # not defined in model
-                additional_data[key] = value
-                continue
-            # key in value
-            attr = name_to_instance[key]
-            if isinstance(attr, MapAttribute) and type(attr) != MapAttribute:
-                additional_data[key] = cls._retrieve_additional_data(
-                    value or {}, attr.get_attributes()
-                )
-            elif isinstance(attr, ListAttribute) and \
-                    attr.element_type and \
-                    issubclass(attr.element_type, MapAttribute) and \
-                    attr.element_type != MapAttribute:
-                inner_attributes = attr.element_type.get_attributes()
-                additional_data[key] = [
-                    cls._retrieve_additional_data(v or {}, inner_attributes)
-                    for v in value
-                ]
-            # else:
-            #     pass
-        return additional_data
+        result = {}
+        # nested mappings are walked with an explicit stack of
+        # (document, its container, dict to collect additional data to)
+        stack = [(document, container, result)]
+        while stack:
+            document, container, additional_data = stack.pop()
+            name_to_instance = _name_to_attribute(container)
+            for key, value in document.items():
+                if key not in name_to_instance:  # not defined in model
+                    additional_data[key] = value
+                    continue
+                # key in value
+                attr = name_to_instance[key]
+                if isinstance(attr, MapAttribute) and \
+                        type(attr) != MapAttribute:
+                    additional_data[key] = inner = {}
+                    stack.append((value or {}, type(attr), inner))
+                elif isinstance(attr, ListAttribute) and \
+                        attr.element_type and \
+                        issubclass(attr.element_type, MapAttribute) and \
+                        attr.element_type != MapAttribute:
+                    additional_data[key] = items = []
+                    for v in value:
+                        items.append(inner := {})
+                        stack.append((v or {}, attr.element_type, inner))
+                # else:
+                #     pass
+        return result
 
     @classmethod
     def _update_with_additional_data(cls, document: dict,
@@ -79,39 +96,44 @@ class BaseSafeUpdateModel(BaseModel):
         :param additional_data:
         :return:
         """
-        for key, value in additional_data.items():
-            if key not in document:  # not defined
-                document[key] = value
-                continue
-            # deep update
-            doc = document[key]
-            if type(doc) != type(value):
-                _LOG.warning(
-                    'Somehow the type of existing model declaration '
-                    f'does not correspond to the type of additional '
-                    f'value: {doc} - {value}'
-                )
-                continue
-            if isinstance(doc, dict):
-                cls._update_with_additional_data(doc, value)
-            elif isinstance(doc, list):  # list of dicts
-                # here there is a problem. We keep nested additional
-                # data for lists by its order. But nothing prevents us from
-                # changing the number of items in the list or clearing it,
-                # for example. Currently, it will work correctly in case the
-                # items of the list are not impaired
-                for i, dct in enumerate(doc):
-                    _data = value[i] if len(value) > i else None
-                    if _data:
-                        cls._update_with_additional_data(dct, _data)
+        # nested mappings are walked with an explicit stack of
+        # (document, additional_data) pairs instead of recursion
+        stack = [(document, additional_data)]
+        while stack:
+            document, additional_data = stack.pop()
+            for key, value in additional_data.items():
+                if key not in document:  # not defined
+                    document[key] = value
+                    continue
+                # deep update
+                doc = document[key]
+                if type(doc) != type(value):
+                    _LOG.warning(
+                        'Somehow the type of existing model declaration '
+                        f'does not correspond to the type of additional '
+                        f'value: {doc} - {value}'
+                    )
+                    continue
+                if isinstance(doc, dict):
+                    stack.append((doc, value))
+                elif isinstance(doc, list):  # list of dicts
+                    # here there is a problem. We keep nested additional
+                    # data for lists by its order. But nothing prevents us
+                    # from changing the number of items in the list or
+                    # clearing it, for example. Currently, it will work
+                    # correctly in case the items of the list are not
+                    # impaired
+                    for i, dct in enumerate(doc):
+                        _data = value[i] if len(value) > i else None
+                        if _data:
+                            stack.append((dct, _data))
 
     @classmethod
     def _instantiate(cls, attribute_values):
         instance = super()._instantiate(attribute_values)
 
         additional_data = cls._retrieve_additional_data(
-            DynamoDBJsonSerializer.deserialize_model(attribute_values),
-            instance.get_attributes()
+            DynamoDBJsonSerializer.deserialize_model(attribute_values), cls
         )
         setattr(instance, cls._additional_data_attr_name, additional_data)
         return instance
@@ -125,12 +147,14 @@ class BaseSafeUpdateModel(BaseModel):
         """
         attribute_values = self.serialize(null_check)
         # ---- our code below ----
-        dct = DynamoDBJsonSerializer.deserialize_model(attribute_values)
-        self._update_with_additional_data(
-            document=dct,
-            additional_data=getattr(self, self._additional_data_attr_name, {})
-        )
-        attribute_values = DynamoDBJsonSerializer.serialize_model(dct)
+        additional_data = getattr(self, self._additional_data_attr_name, {})
+        if additional_data:  # new items have nothing to merge
+            dct = DynamoDBJsonSerializer.deserialize_model(attribute_values)
+            self._update_with_additional_data(
+                document=dct,
+                additional_data=additional_data
+            )
+            attribute_values = DynamoDBJsonSerializer.serialize_model(dct)
         # ---- our code above ----
         hash_key_attribute = self._hash_key_attribute()
         hash_key = attribute_values.pop(hash_key_attribute.attr_name, {}).get(
@@ -156,12 +180,23 @@ class BaseSafeUpdateModel(BaseModel):
     def dynamodb_model(self):
         """For MongoDB"""
         result = super().dynamodb_model()
-        self._update_with_additional_data(
-            document=result,
-            additional_data=getattr(self, self._additional_data_attr_name, {})
-        )
+        additional_data = getattr(self, self._additional_data_attr_name, {})
+        if additional_data:
+            self._update_with_additional_data(
+                document=result,
+                additional_data=additional_data
+            )
         return result
 
+    @classmethod
+    def mongo_fields(cls, attributes_to_get: Optional[List] = None
+                     ) -> Optional[FrozenSet[str]]:
+        """
+        Attributes that are not defined in the model are kept in additional
+        data, so whole documents are always fetched
+        """
+        return
+
     @classmethod
     def from_json(cls, model_json: dict,
                   attributes_to_get: Optional[List] = None, instance=None
@@ -177,7 +212,7 @@ class BaseSafeUpdateModel(BaseModel):
         if not model_json:
             return
         _additional_data = \
-            cls._retrieve_additional_data(model_json, cls.get_attributes())
+            cls._retrieve_additional_data(model_json, cls)
         _additional_data.pop('_id', None)
         instance = super().from_json(model_json, attributes_to_get, instance)
         setattr(instance, cls._additional_data_attr_name, _additional_data)
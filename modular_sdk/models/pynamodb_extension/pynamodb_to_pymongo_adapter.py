@@ -1,10 +1,12 @@
-import json
-import json
 import re
 import decimal
+from collections import defaultdict
+from functools import lru_cache, partial
 from itertools import islice
-from typing import Optional, Dict, List, Union, TypeVar, Iterator
+from typing import (Optional, Dict, List, Union, TypeVar, Iterator, Callable,
+                    FrozenSet, Iterable)
 
+from bson.regex import Regex
 from pymongo import DeleteOne, ReplaceOne, DESCENDING, ASCENDING
 from pymongo.collection import Collection, ReturnDocument
 from pymongo.errors import BulkWriteError
@@ -16,7 +18,10 @@ from pynamodb.models import Model
 from pynamodb.settings import OperationSettings
 
 from modular_sdk.commons import DynamoDBJsonSerializer
+from modular_sdk.commons.constants import Env
 from modular_sdk.connections.mongodb_connection import MongoDBConnection
+from modular_sdk.models.pynamodb_extension.base_model import \
+    attributes_to_get_names
 
 T = TypeVar('T')
 
@@ -24,33 +29,71 @@ T = TypeVar('T')
 class Result(Iterator[T]):
     def __init__(self, result: Iterator[T],
                  _evaluated_key: Optional[int] = None,
-                 page_size: Optional[int] = None):
+                 page_size: Optional[Union[int, Callable[[], int]]] = None):
+        """
+        :param page_size: total number of items or a callable that counts
+        them. The callable is invoked only if last_evaluated_key is requested
+        """
         self._result_it = result
         self._evaluated_key = _evaluated_key
         self._page_size = page_size
+        self._iterator = self._iterate()
+
+    @property
+    def page_size(self) -> Optional[int]:
+        if callable(self._page_size):
+            self._page_size = self._page_size()
+        return self._page_size
 
     @property
     def last_evaluated_key(self):
         _key = self._evaluated_key
-        if _key is not None and _key < self._page_size:
+        if _key is not None and _key < self.page_size:
             return _key
 
-    def __iter__(self):
-        return self
+    def _iterate(self) -> Iterator[T]:
+        # a generator is resumed much cheaper than a python-level __next__
+        # is called, so loops over the result iterate it directly
+        if self._evaluated_key is None:
+            yield from self._result_it
+            return
+        for self._evaluated_key, item in enumerate(self._result_it,
+                                                   self._evaluated_key + 1):
+            yield item
 
-    def __next__(self) -> T:
-        item = self._result_it.__next__()
+    def __iter__(self) -> Iterator[T]:
+        return self._iterator
 
-        if self._evaluated_key is not None:
-            self._evaluated_key += 1
-        return item
+    def __next__(self) -> T:
+        return next(self._iterator)
 
 
 class BatchWrite:
-    def __init__(self, model, mongo_connection):
+    def __init__(self, model, mongo_connection, ordered: bool = False):
+        """
+        Pending operations are flushed each time their number reaches
+        MODULAR_SDK_MONGO_BATCH_SIZE. They are written unordered by default
+        so that MongoDB need not apply them one by one. If a key repeats
+        among the pending operations, they are written ordered to keep
+        the order in which they were added
+        """
         self.collection_name = model.Meta.table_name
         self.mongo_connection = mongo_connection
+        self.ordered = ordered
+        self.max_batch_size = int(Env.MONGO_BATCH_SIZE.get())
         self.request = []
+        self._keys = set()
+        self._key_repeated = False
+
+    def _append(self, operation, keys: dict):
+        key = tuple(keys.items())
+        if key in self._keys:
+            self._key_repeated = True
+        else:
+            self._keys.add(key)
+        self.request.append(operation)
+        if len(self.request) >= self.max_batch_size:
+            self.commit()
 
     def save(self, put_item):
         json_to_save = put_item.dynamodb_model()
@@ -62,11 +105,12 @@ class BatchWrite:
                 if value is not None
             }
         )
-        self.request.append(ReplaceOne(put_item.get_keys(),
-                                       encoded_document, upsert=True))
+        keys = put_item.get_keys()
+        self._append(ReplaceOne(keys, encoded_document, upsert=True), keys)
 
     def delete(self, del_item):
-        self.request.append(DeleteOne(del_item._get_keys()))
+        keys = del_item._get_keys()
+        self._append(DeleteOne(keys), keys)
 
     def __enter__(self):
         return self
@@ -80,15 +124,19 @@ class BatchWrite:
 
         if not self.request:
             return
+        request, self.request = self.request, []
+        ordered = self.ordered or self._key_repeated
+        self._keys.clear()
+        self._key_repeated = False
         try:
-            collection.bulk_write(self.request)
+            collection.bulk_write(request, ordered=ordered)
         except BulkWriteError:
             pass
 
 
 class _PynamoDBExpressionsConverter:
     # Looks for [1], [2], [12], etc in a string
-    index_regex: re.Pattern = re.compile('\[\d+\]')
+    index_regex: re.Pattern = re.compile(r'\[(\d+)\]')
 
     @staticmethod
     def _preprocess(val: T) -> T:
@@ -97,16 +145,22 @@ class _PynamoDBExpressionsConverter:
         - decimal.Decimal
         Changes the given collection in place but also returns it
         """
-        if isinstance(val, dict):
-            for k, v in val.items():
-                val[k] = _PynamoDBExpressionsConverter._preprocess(v)
-            return val
-        if isinstance(val, list):
-            for i, v in enumerate(val):
-                val[i] = _PynamoDBExpressionsConverter._preprocess(v)
-            return val
         if isinstance(val, decimal.Decimal):
             return float(val)
+        if isinstance(val, dict):
+            items = val.items()
+        elif isinstance(val, list):
+            items = enumerate(val)
+        else:
+            return val
+        # scalar leaves are handled in place so that the function recurses
+        # only into nested collections
+        preprocess = _PynamoDBExpressionsConverter._preprocess
+        for k, v in items:
+            if isinstance(v, decimal.Decimal):
+                val[k] = float(v)
+            elif isinstance(v, (dict, list)):
+                preprocess(v)
         return val
 
     @staticmethod
@@ -135,10 +189,9 @@ class _PynamoDBExpressionsConverter:
         :return:
         """
         raw = str(path)
-        for index in re.findall(cls.index_regex, raw):
-            n = index.strip('[]')
-            raw = raw.replace(index, f'.{n}')
-        return raw
+        if '[' not in raw:  # most paths do not address list items
+            return raw
+        return cls.index_regex.sub(r'.\1', raw)
 
 
 class ConditionConverter(_PynamoDBExpressionsConverter):
@@ -158,69 +211,115 @@ class ConditionConverter(_PynamoDBExpressionsConverter):
     }
 
     @classmethod
-    def convert(cls, condition: Condition) -> dict:
-        op = condition.operator
-        if op == 'OR':
-            return {
-                '$or': [cls.convert(cond) for cond in condition.values]
-            }
-        if op == 'AND':
-            return {
-                '$and': [cls.convert(cond) for cond in condition.values]
-            }
-        if op == 'NOT':
-            return {
-                '$nor': [cls.convert(condition.values[0])]
-            }
-        if op == 'attribute_exists':
-            return {
-                cls.path_to_raw(condition.values[0]): {'$exists': True}
-            }
-        if op == 'attribute_not_exists':
-            return {
-                cls.path_to_raw(condition.values[0]): {'$exists': False}
-            }
-        if op == 'contains':
-            return {
-                cls.path_to_raw(condition.values[0]): {
-                    '$regex': cls.value_to_raw(condition.values[1])
-                }
+    def _or(cls, condition: Condition) -> dict:
+        return {
+            '$or': [cls.convert(cond) for cond in condition.values]
+        }
+
+    @classmethod
+    def _and(cls, condition: Condition) -> dict:
+        return {
+            '$and': [cls.convert(cond) for cond in condition.values]
+        }
+
+    @classmethod
+    def _not(cls, condition: Condition) -> dict:
+        return {
+            '$nor': [cls.convert(condition.values[0])]
+        }
+
+    @classmethod
+    def _exists(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): {'$exists': True}
+        }
+
+    @classmethod
+    def _not_exists(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): {'$exists': False}
+        }
+
+    @classmethod
+    def _contains(cls, condition: Condition) -> dict:
+        value = cls.value_to_raw(condition.values[1])
+        if not isinstance(value, str):
+            # contains() for a list/set attribute checks that the element
+            # is present. Mongo matches array elements by equality
+            return {cls.path_to_raw(condition.values[0]): value}
+        return {
+            cls.path_to_raw(condition.values[0]): {
+                '$regex': Regex(re.escape(value))
             }
-        if op == 'IN':
-            return {
-                cls.path_to_raw(condition.values[0]): {
-                    '$in': list(
-                        cls.value_to_raw(v) for v in
-                        islice(condition.values, 1, None)
-                    )
-                }
+        }
+
+    @classmethod
+    def _in(cls, condition: Condition) -> dict:
+        value_to_raw = cls.value_to_raw
+        return {
+            cls.path_to_raw(condition.values[0]): {
+                '$in': [value_to_raw(v) for v in condition.values[1:]]
             }
-        if op == '=':
-            return {
-                cls.path_to_raw(condition.values[0]): cls.value_to_raw(
+        }
+
+    @classmethod
+    def _equals(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): cls.value_to_raw(
+                condition.values[1])
+        }
+
+    @classmethod
+    def _comparison(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): {
+                cls.comparison_map[condition.operator]: cls.value_to_raw(
                     condition.values[1])
             }
-        if op in cls.comparison_map:
-            _mongo_op = cls.comparison_map[op]
-            return {
-                cls.path_to_raw(condition.values[0]): {
-                    _mongo_op: cls.value_to_raw(condition.values[1])
-                }
-            }
-        if op == 'BETWEEN':
-            return {
-                cls.path_to_raw(condition.values[0]): {
-                    '$gte': cls.value_to_raw(condition.values[1]),
-                    '$lte': cls.value_to_raw(condition.values[2])
-                }
+        }
+
+    @classmethod
+    def _between(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): {
+                '$gte': cls.value_to_raw(condition.values[1]),
+                '$lte': cls.value_to_raw(condition.values[2])
             }
-        if op == 'begins_with':
-            return {
-                cls.path_to_raw(condition.values[0]): {
-                    '$regex': f'^{cls.value_to_raw(condition.values[1])}'
-                }
+        }
+
+    @classmethod
+    def _begins_with(cls, condition: Condition) -> dict:
+        return {
+            cls.path_to_raw(condition.values[0]): {
+                '$regex': Regex(
+                    f'^{re.escape(cls.value_to_raw(condition.values[1]))}'
+                )
             }
-        raise NotImplementedError(f'Operator: {op} is not supported')
+        }
+
+    # operator to the name of its handler, so that subclasses can
+    # override handlers
+    handlers_map: Dict[str, str] = {
+        'OR': '_or',
+        'AND': '_and',
+        'NOT': '_not',
+        'attribute_exists': '_exists',
+        'attribute_not_exists': '_not_exists',
+        'contains': '_contains',
+        'IN': '_in',
+        '=': '_equals',
+        **dict.fromkeys(comparison_map, '_comparison'),
+        'BETWEEN': '_between',
+        'begins_with': '_begins_with'
+    }
+
+    @classmethod
+    def convert(cls, condition: Condition) -> dict:
+        op = condition.operator
+        name = cls.handlers_map.get(op)
+        if not name:
+            raise NotImplementedError(f'Operator: {op} is not supported')
+        return getattr(cls, name)(condition)
 
 
 class UpdateExpressionConverter(_PynamoDBExpressionsConverter):
@@ -283,26 +382,43 @@ class UpdateExpressionConverter(_PynamoDBExpressionsConverter):
 
 
 class PynamoDBToPyMongoAdapter:
+    batch_get_size = 1000
 
     def __init__(self, mongodb_connection: MongoDBConnection):
         self.mongodb = mongodb_connection
 
-    def batch_get(self, model_class, items, attributes_to_get=None):
-        collection = self._collection_from_model(model_class)
-        query_params = []
+    def _batch_get_query(self, model_class, items: list) -> dict:
         hash_key_name, range_key_name = self.__get_table_keys(model_class)
-        if isinstance(items[0], tuple):
-            query_params.append({'$or': [{hash_key_name: item[0],
-                                          range_key_name: item[1]}
-                                         for item in items]})
-        else:
-            query_params.append(
-                {'$or': [{hash_key_name: item} for item in items]})
-        raw_items = collection.find(*query_params)
-        return [model_class.from_json(
-            model_json=self.mongodb.decode_keys(item),
-            attributes_to_get=attributes_to_get)
-            for item in raw_items]
+        if not isinstance(items[0], (tuple, list)):
+            return {hash_key_name: {'$in': items}}
+        if len({item[0] for item in items}) == 1:
+            # all the keys share one hash key, so it's a single index range
+            return {hash_key_name: items[0][0],
+                    range_key_name: {'$in': [item[1] for item in items]}}
+        return {'$or': [{hash_key_name: item[0], range_key_name: item[1]}
+                        for item in items]}
+
+    def batch_get(self, model_class, items: Iterable,
+                  attributes_to_get=None) -> list:
+        """
+        Keys are requested in chunks of batch_get_size, one query per chunk
+        :param model_class:
+        :param items: hash keys or (hash key, range key) pairs
+        :param attributes_to_get:
+        :return:
+        """
+        collection = self._collection_from_model(model_class)
+        projection = self._projection(model_class, attributes_to_get)
+        result = []
+        items = iter(items)
+        while chunk := list(islice(items, self.batch_get_size)):
+            raw_items = collection.find(
+                self._batch_get_query(model_class, chunk), projection
+            )
+            result.extend(
+                self._iter_models(model_class, raw_items, attributes_to_get)
+            )
+        return result
 
     def delete(self, model_instance):
         collection = self._collection_from_model(model_instance)
@@ -325,36 +441,45 @@ class PynamoDBToPyMongoAdapter:
                 if value is not None
             }
         )
-        collection.replace_one(model_instance.get_keys(),
-                               encoded_document, upsert=True)
+        res = collection.replace_one(model_instance.get_keys(),
+                                     encoded_document, upsert=True)
+        if res.upserted_id is not None:
+            # the same as instances that are retrieved from db have
+            model_instance.mongo_id = res.upserted_id
 
     def update(self, model_instance, actions: List[Action],
                condition: Optional[Condition] = None,
                settings: OperationSettings = OperationSettings.default):
         collection = self._collection_from_model(model_instance)
-        _update = {}
-        for dct in [UpdateExpressionConverter.convert(a) for a in actions]:
+        _update = defaultdict(dict)
+        convert = UpdateExpressionConverter.convert
+        for dct in map(convert, actions):
             for action, query in dct.items():
-                _update.setdefault(action, {}).update(query)
+                _update[action] |= query
+        # the instance is refreshed from the updated document the same way
+        # PynamoDB does, so only the fields the model needs are returned
         res = collection.find_one_and_update(
             filter=model_instance.get_keys(),
-            update=_update,
+            update=dict(_update),
+            projection=self._projection(type(model_instance)),
             upsert=True,
             return_document=ReturnDocument.AFTER
         )
         if res:
             type(model_instance).from_json(res, instance=model_instance)
 
-    def get(self, model_class, hash_key, range_key=None) -> Model:
+    def get(self, model_class, hash_key, range_key=None,
+            attributes_to_get=None) -> Model:
         result = self.get_nullable(model_class=model_class,
                                    hash_key=hash_key,
-                                   sort_key=range_key)
+                                   sort_key=range_key,
+                                   attributes_to_get=attributes_to_get)
         if not result:
             raise model_class.DoesNotExist()
         return result
 
-    def get_nullable(self, model_class, hash_key, sort_key=None
-                     ) -> Optional[Model]:
+    def get_nullable(self, model_class, hash_key, sort_key=None,
+                     attributes_to_get=None) -> Optional[Model]:
         hash_key_name, range_key_name = self.__get_table_keys(model_class)
 
         if not hash_key_name:
@@ -370,19 +495,20 @@ class PynamoDBToPyMongoAdapter:
         params = {hash_key_name: hash_key}
         if range_key_name and sort_key:
             params[range_key_name] = sort_key
-        raw_item = collection.find_one(params)
+        raw_item = collection.find_one(
+            params, self._projection(model_class, attributes_to_get)
+        )
         if raw_item:
             raw_item = self.mongodb.decode_keys(raw_item)
-            return model_class.from_json(raw_item)
+            return model_class.from_json(raw_item, attributes_to_get)
 
     def query(self, model_class, hash_key, range_key_condition=None,
               filter_condition=None, limit=None, last_evaluated_key=None,
-              attributes_to_get=None, scan_index_forward=True):
+              attributes_to_get=None, scan_index_forward=True,
+              index_name=None):
         # works both for Model and Index
-        hash_key_name = getattr(model_class._hash_key_attribute(),
-                                'attr_name', None)
-        range_key_name = getattr(model_class._range_key_attribute(),
-                                 'attr_name', None)
+        hash_key_name, range_key_name = self.__get_table_keys(model_class,
+                                                              index_name)
         if issubclass(model_class, indexes.Index):
             model_class = model_class.Meta.model
 
@@ -397,17 +523,18 @@ class PynamoDBToPyMongoAdapter:
         limit = limit or 0  # ZERO means no limit
         last_evaluated_key = last_evaluated_key or 0
 
-        cursor = collection.find(_query).limit(limit).skip(last_evaluated_key)
+        cursor = collection.find(
+            _query, self._projection(model_class, attributes_to_get)
+        ).limit(limit).skip(last_evaluated_key)
         if range_key_name:
             cursor = cursor.sort(
                 range_key_name, ASCENDING if scan_index_forward else
                 DESCENDING
             )
         return Result(
-            result=(model_class.from_json(self.mongodb.decode_keys(i),
-                                          attributes_to_get) for i in cursor),
+            result=self._iter_models(model_class, cursor, attributes_to_get),
             _evaluated_key=last_evaluated_key,
-            page_size=collection.count_documents(_query)
+            page_size=partial(collection.count_documents, _query)
         )
 
     def scan(self, model_class, filter_condition=None, limit=None,
@@ -421,14 +548,29 @@ class PynamoDBToPyMongoAdapter:
         limit = limit or 0  # ZERO means no limit
         last_evaluated_key = last_evaluated_key or 0
 
-        cursor = collection.find(_query).limit(limit).skip(last_evaluated_key)
+        cursor = collection.find(
+            _query, self._projection(model_class, attributes_to_get)
+        ).limit(limit).skip(last_evaluated_key)
         return Result(
-            result=(model_class.from_json(self.mongodb.decode_keys(i),
-                                          attributes_to_get) for i in cursor),
+            result=self._iter_models(model_class, cursor, attributes_to_get),
             _evaluated_key=last_evaluated_key,
-            page_size=collection.count_documents(_query)
+            page_size=partial(collection.count_documents, _query)
         )
 
+    def _iter_models(self, model_class, documents: Iterable[dict],
+                     attributes_to_get=None) -> Iterator[Model]:
+        """
+        Builds models from raw MongoDB documents one by one
+        """
+        if attributes_to_get:  # resolved once instead of for each document
+            attributes_to_get = frozenset(
+                attributes_to_get_names(attributes_to_get)
+            )
+        from_json = model_class.from_json
+        decode_keys = self.mongodb.decode_keys
+        for document in documents:
+            yield from_json(decode_keys(document), attributes_to_get)
+
     def refresh(self, consistent_read):
         raise NotImplementedError
 
@@ -443,15 +585,11 @@ class PynamoDBToPyMongoAdapter:
               limit=None) -> int:
         collection = self._collection_from_model(model_class)
 
-        hash_key_name = getattr(model_class._hash_key_attribute(),
-                                'attr_name', None)
-        if index_name:
-            hash_key_name = getattr(
-                model_class._indexes[index_name]._hash_key_attribute(),
-                'attr_name', None
-            )
+        hash_key_name, _ = self.__get_table_keys(model_class, index_name)
 
-        _query = {hash_key_name: hash_key}
+        _query = {}
+        if hash_key is not None:  # without hash key it counts the table
+            _query[hash_key_name] = hash_key
         if range_key_condition is not None:
             _query.update(ConditionConverter.convert(range_key_condition))
 
@@ -460,24 +598,59 @@ class PynamoDBToPyMongoAdapter:
 
         if limit:
             return collection.count_documents(_query, limit=limit)
-
+        if not _query:
+            # collection metadata instead of a scan
+            return collection.estimated_document_count()
         return collection.count_documents(_query)
 
-    def batch_write(self, model_class) -> BatchWrite:
-        return BatchWrite(model=model_class, mongo_connection=self.mongodb)
+    def batch_write(self, model_class, ordered: bool = False) -> BatchWrite:
+        return BatchWrite(model=model_class, mongo_connection=self.mongodb,
+                          ordered=ordered)
+
+    @classmethod
+    def _projection(cls, model_class, attributes_to_get=None
+                    ) -> Optional[dict]:
+        """
+        MongoDB projection that fetches only the fields the model needs.
+        None means that the whole documents are fetched
+        """
+        fields = model_class.mongo_fields(attributes_to_get)
+        if fields is None:
+            return
+        return cls._build_projection(fields)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _build_projection(names: FrozenSet[str]) -> dict:
+        # the same subsets are requested over and over so projections are
+        # cached. Keys are encoded the same way documents are
+        encode = MongoDBConnection.encode_keys
+        return encode(dict.fromkeys(names, 1))
 
     @staticmethod
-    def __get_table_keys(model_class) -> tuple:
-        short_to_body_mapping = {attr_body.attr_name: attr_body
-                                 for attr_name, attr_body in
-                                 model_class._attributes.items()}
+    @lru_cache(maxsize=None)
+    def __get_table_keys(model_class, index_name: Optional[str] = None
+                         ) -> tuple:
+        """
+        Hash and range key names of the model, of its index with the given
+        name or of the given index class. Attributes do not change after
+        the classes are created so the result is cached
+        """
+        if index_name:
+            model_class = type(model_class._indexes[index_name])
+        if issubclass(model_class, indexes.Index):
+            attributes = model_class.Meta.attributes
+        else:
+            attributes = model_class._attributes
         hash_key_name = None
         range_key_name = None
-        for short_name, body in short_to_body_mapping.items():
+        for body in attributes.values():
             if body.is_hash_key:
-                hash_key_name = short_name
-                continue
-            if body.is_range_key:
-                range_key_name = short_name
-                continue
+                hash_key_name = body.attr_name
+                if range_key_name:
+                    break
+            elif body.is_range_key:
+                range_key_name = body.attr_name
+                if hash_key_name:
+                    break
         return hash_key_name, range_key_name
@@ -1,5 +1,11 @@
+import copy
+import threading
+from typing import Optional
+
+from cachetools import TTLCache
 from pynamodb.attributes import UnicodeAttribute
 
+from modular_sdk.commons.constants import Env
 from modular_sdk.models.base_meta import BaseMeta
 from modular_sdk.models.pynamodb_extension.base_model import DynamicAttribute
 from modular_sdk.models.pynamodb_extension.base_role_access_model import \
@@ -7,8 +13,83 @@ from modular_sdk.models.pynamodb_extension.base_role_access_model import \
 
 
 class Setting(BaseRoleAccessModel):
+    """
+    Settings are small and read much more often than written so
+    get_nullable keeps found items in a process-wide TTL cache and returns
+    copies of them. Writes made through this model drop the cached item.
+    Ones made by other processes become visible after
+    MODULAR_SDK_SETTINGS_CACHE_TTL_SECONDS (0 disables the cache). So do
+    the ones made with Setting.batch_write()
+    """
+    _cache: Optional[TTLCache] = None
+    _cache_lock = threading.Lock()  # cachetools caches are not thread-safe
+    # bumped by each write so that reads that started before it do not
+    # put the old item back to the cache
+    _cache_generation = 0
+
     class Meta(BaseMeta):
         table_name = 'Settings'
 
     name = UnicodeAttribute(hash_key=True, attr_name='s')
     value = DynamicAttribute(attr_name='v')
+
+    @classmethod
+    def _get_cache(cls) -> Optional[TTLCache]:
+        if Setting._cache is None:
+            ttl = int(Env.SETTINGS_CACHE_TTL_SECONDS.get())
+            if not ttl:
+                return
+            with Setting._cache_lock:
+                if Setting._cache is None:
+                    Setting._cache = TTLCache(maxsize=512, ttl=ttl)
+        return Setting._cache
+
+    @classmethod
+    def reset_cache(cls):
+        with Setting._cache_lock:
+            Setting._cache = None
+
+    @classmethod
+    def get_nullable(cls, hash_key, range_key=None, attributes_to_get=None,
+                     consistent_read=False) -> Optional['Setting']:
+        cache = cls._get_cache()
+        if cache is None or attributes_to_get or consistent_read:
+            return super().get_nullable(hash_key, range_key,
+                                        attributes_to_get, consistent_read)
+        with Setting._cache_lock:
+            item = cache.get(hash_key)
+            generation = Setting._cache_generation
+        if item is None:
+            item = super().get_nullable(hash_key, range_key)
+            if item is None:
+                return
+            with Setting._cache_lock:
+                if Setting._cache_generation == generation:
+                    cache[hash_key] = item
+        # deepcopy keeps additional data and mongo_id, unlike serialize().
+        # Values are usually dicts or lists that callers may change in place
+        return copy.deepcopy(item)
+
+    def _invalidate(self):
+        with Setting._cache_lock:
+            Setting._cache_generation += 1
+            if (cache := Setting._cache) is not None:
+                cache.pop(self.name, None)
+
+    def save(self, *args, **kwargs):
+        try:
+            return super().save(*args, **kwargs)
+        finally:
+            self._invalidate()
+
+    def update(self, *args, **kwargs):
+        try:
+            return super().update(*args, **kwargs)
+        finally:
+            self._invalidate()
+
+    def delete(self, *args, **kwargs):
+        try:
+            return super().delete(*args, **kwargs)
+        finally:
+            self._invalidate()
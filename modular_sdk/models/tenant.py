@@ -114,10 +114,9 @@ class Tenant(BaseRoleAccessModel):
     dntl_c_index = DisplayNameToLowerCloudIndex()
 
     def get_parent_id(self, type_: str) -> Optional[str]:
-        assert type_ in ALLOWED_TENANT_PARENT_MAP_KEYS
-        if type_ in self.parent_map:
-            return self.parent_map[type_]
-        return
+        if type_ not in ALLOWED_TENANT_PARENT_MAP_KEYS:
+            raise AssertionError(f'Not allowed parent map type: {type_}')
+        return self.parent_map.attribute_values.get(type_)
 
     @property
     def accN_index(self):
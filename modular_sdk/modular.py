@@ -29,8 +29,7 @@ class Modular(metaclass=SingletonMeta):
     __events_service = None
     __rabbit_transport_service = None
     __http_transport_service = None
-    __settings_service = None
-    __instantiated_setting_group = []
+    __settings_services = {}
     __credentials_service = None
     __thread_local_storage_service = None
 
@@ -227,14 +226,14 @@ class Modular(metaclass=SingletonMeta):
         return self.__http_transport_service
 
     def settings_service(self, group_name):
-        if not self.__settings_service or \
-                group_name not in self.__instantiated_setting_group:
+        group_name = group_name.upper()
+        if group_name not in self.__settings_services:
             from modular_sdk.services.settings_management_service import \
                 SettingsManagementService
-            self.__settings_service = SettingsManagementService(
+            self.__settings_services[group_name] = SettingsManagementService(
                 group_name=group_name
             )
-        return self.__settings_service
+        return self.__settings_services[group_name]
 
     def ssm_service(self):
         if not self.__ssm_service:
@@ -100,7 +100,7 @@ class MaestroHTTPTransport(AbstractTransport):
         except binascii.Error:
             response_item = response.decode('utf-8')
         try:
-            _LOG.debug(f'Raw decrypted message from server: {response_item}')
+            _LOG.debug('Raw decrypted message from server: %s', response_item)
             response_json = json.loads(response_item).get('results')[0]
         except json.decoder.JSONDecodeError:
             _LOG.error('Response cannot be decoded - invalid JSON string')
@@ -17,13 +17,13 @@ class ThreadLocalStorageService:
         return self.__storage.value
 
     def set(self, key: str, value):
-        _LOG.debug(f'Setting {key} to storage')
+        _LOG.debug('Setting %s to storage', key)
         self.storage[key] = value
 
     def get(self, key):
-        _LOG.debug(f'Extracting {key} var from storage')
+        _LOG.debug('Extracting %s var from storage', key)
         return self.storage.get(key)
 
     def pop(self, key):
-        _LOG.debug(f'Pop {key} var from storage')
+        _LOG.debug('Pop %s var from storage', key)
         return self.storage.pop(key, None)
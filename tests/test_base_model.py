@@ -0,0 +1,143 @@
+import json
+from datetime import datetime, timezone
+from enum import IntEnum
+from unittest.mock import patch
+
+from bson import ObjectId
+from pynamodb.attributes import UnicodeAttribute, MapAttribute, ListAttribute
+from pynamodb.indexes import AllProjection
+
+from modular_sdk.models.pynamodb_extension.base_model import \
+    json_to_attribute_value, ModelEncoder, BaseModel, BaseGSI, \
+    attributes_to_get_names
+
+
+class Level(IntEnum):
+    LOW = 1
+
+
+class ExampleMap(MapAttribute):
+    name = UnicodeAttribute(attr_name='n')
+    value = UnicodeAttribute(attr_name='v', null=True)
+
+
+class ExampleIndex(BaseGSI):
+    class Meta:
+        index_name = 'ExampleIndex'
+        projection = AllProjection()
+
+    custom = UnicodeAttribute(hash_key=True, attr_name='c')
+    key = UnicodeAttribute(range_key=True, attr_name='k')
+
+
+class ExampleModel(BaseModel):
+    class Meta:
+        table_name = 'Example'
+        region = 'us-west-1'
+
+    key = UnicodeAttribute(hash_key=True, attr_name='k')
+    custom = ExampleMap(attr_name='c', null=True)
+    custom_list = ListAttribute(of=ExampleMap, attr_name='cl', default=list)
+    raw = MapAttribute(attr_name='r', default=dict)
+
+
+def test_json_to_attribute_value_scalars():
+    assert json_to_attribute_value(None) == {'NULL': True}
+    assert json_to_attribute_value(True) == {'BOOL': True}
+    assert json_to_attribute_value(False) == {'BOOL': False}
+    assert json_to_attribute_value(1) == {'N': '1'}
+    assert json_to_attribute_value(1.5) == {'N': '1.5'}
+    assert json_to_attribute_value(0.1 + 0.2) == {'N': '0.30000000000000004'}
+    assert json_to_attribute_value(10 ** 20) == {'N': '100000000000000000000'}
+    assert json_to_attribute_value(float('inf')) == {'N': 'Infinity'}
+    assert json_to_attribute_value('str') == {'S': 'str'}
+
+
+def test_json_to_attribute_value_collections():
+    assert json_to_attribute_value([1, 'str', None]) == {
+        'L': [{'N': '1'}, {'S': 'str'}, {'NULL': True}]
+    }
+    assert json_to_attribute_value({'a': {'b': [False]}}) == {
+        'M': {'a': {'M': {'b': {'L': [{'BOOL': False}]}}}}
+    }
+
+
+def test_json_to_attribute_value_homogeneous_lists():
+    assert json_to_attribute_value(['a', 'b', 'c', 'd']) == {
+        'L': [{'S': 'a'}, {'S': 'b'}, {'S': 'c'}, {'S': 'd'}]
+    }
+    assert json_to_attribute_value([1, 2, 3, 4]) == {
+        'L': [{'N': '1'}, {'N': '2'}, {'N': '3'}, {'N': '4'}]
+    }
+    assert json_to_attribute_value([1, 2, 3, True]) == {
+        'L': [{'N': '1'}, {'N': '2'}, {'N': '3'}, {'BOOL': True}]
+    }
+
+
+def test_json_to_attribute_value_subclasses():
+    assert json_to_attribute_value(Level.LOW) == {'N': '1'}
+
+
+def test_json_to_attribute_value_mongo_specific():
+    _id = ObjectId()
+    date = datetime.now(timezone.utc)
+    assert json_to_attribute_value(_id) == {'S': _id}
+    assert json_to_attribute_value(date) == {'S': date}
+
+
+def test_model_encoder():
+    _id = ObjectId()
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert json.loads(json.dumps(
+        {'id': _id, 'date': date, 'bytes': b'b'}, cls=ModelEncoder
+    )) == {'id': str(_id), 'date': '2024-01-01T00:00:00Z', 'bytes': "b'b'"}
+
+
+def test_dynamodb_model():
+    item = ExampleModel(
+        key='key',
+        custom=ExampleMap(name='name', value='value'),
+        custom_list=[ExampleMap(name='one'), ExampleMap(name='two')],
+        raw={'a': {'b': 1}}
+    )
+    assert item.dynamodb_model() == {
+        'k': 'key',
+        'c': {'n': 'name', 'v': 'value'},
+        'cl': [{'n': 'one'}, {'n': 'two'}],
+        'r': {'a': {'b': 1}}
+    }
+
+
+def test_index_key_attributes():
+    assert ExampleIndex._hash_key_attribute().attr_name == 'c'
+    assert ExampleIndex._range_key_attribute().attr_name == 'k'
+
+
+def test_get_nullable_dynamodb():
+    with patch.object(ExampleModel, '_get_connection') as connection:
+        connection().get_item.return_value = {}
+        assert ExampleModel.get_nullable('key') is None
+
+        connection().get_item.return_value = {'Item': {'k': {'S': 'key'}}}
+        assert ExampleModel.get_nullable('key').key == 'key'
+
+
+def test_attributes_to_get_names():
+    assert attributes_to_get_names([ExampleModel.custom, 'k']) == {'c', 'k'}
+    names = frozenset(('c', 'k'))
+    assert attributes_to_get_names(names) is names
+
+
+def test_mongodb_handler_shared(monkeypatch):
+    for env, value in (('modular_mongo_user', 'user'),
+                       ('modular_mongo_password', 'password'),
+                       ('modular_mongo_url', 'localhost:27017'),
+                       ('modular_mongo_db_name', 'db')):
+        monkeypatch.setenv(env, value)
+    try:
+        adapter = ExampleModel.mongodb_handler()
+        assert ExampleIndex.mongodb_handler() is adapter
+        assert adapter.mongodb._default_db_name == 'db'
+    finally:
+        ExampleModel.reset_mongodb()
+        ExampleIndex.reset_mongodb()
@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+from modular_sdk.connections.mongodb_connection import MongoDBConnection
+
+
+@patch('modular_sdk.connections.mongodb_connection.MongoClient')
+def test_client_recreated_after_fork(mongo_client, monkeypatch):
+    monkeypatch.setenv('MODULAR_SDK_MONGO_MAX_POOL_SIZE', '10')
+    connection = MongoDBConnection('mongodb://localhost', 'db')
+    collection = connection.collection('Example')
+    assert connection.collection('Example') is collection
+    mongo_client.assert_called_once_with('mongodb://localhost',
+                                         maxPoolSize=10,
+                                         appname='modular-sdk')
+
+    with patch('os.getpid', return_value=-1):
+        connection.collection('Example')
+    assert mongo_client.call_count == 2
+
+
+@patch('modular_sdk.connections.mongodb_connection.MongoClient')
+def test_client_compressors(mongo_client, monkeypatch):
+    monkeypatch.setenv('MODULAR_SDK_MONGO_COMPRESSORS', 'zstd,zlib')
+    monkeypatch.setenv('MODULAR_SDK_MONGO_APPNAME', 'test')
+    MongoDBConnection('mongodb://localhost').client
+    mongo_client.assert_called_once_with('mongodb://localhost',
+                                         compressors='zstd,zlib',
+                                         appname='test')
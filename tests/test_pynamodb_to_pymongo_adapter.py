@@ -0,0 +1,308 @@
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from bson.regex import Regex
+from pynamodb.attributes import UnicodeAttribute, NumberAttribute, \
+    ListAttribute, MapAttribute
+from pynamodb.expressions.operand import Path
+from pynamodb.indexes import AllProjection
+
+from modular_sdk.models.pynamodb_extension.base_model import BaseModel, \
+    BaseGSI
+from modular_sdk.models.pynamodb_extension.base_safe_update_model import \
+    BaseSafeUpdateModel
+from modular_sdk.models.pynamodb_extension.pynamodb_to_pymongo_adapter import \
+    ConditionConverter, _PynamoDBExpressionsConverter, \
+    PynamoDBToPyMongoAdapter, Result
+
+
+class ExampleIndex(BaseGSI):
+    class Meta:
+        index_name = 'ExampleIndex'
+        projection = AllProjection()
+
+    number = NumberAttribute(hash_key=True, attr_name='n')
+    key = UnicodeAttribute(range_key=True, attr_name='k')
+
+
+class ExampleModel(BaseModel):
+    class Meta:
+        table_name = 'Example'
+        region = 'us-west-1'
+
+    key = UnicodeAttribute(hash_key=True, attr_name='k')
+    sort = UnicodeAttribute(range_key=True, attr_name='s')
+    number = NumberAttribute(attr_name='n', null=True)
+    items = ListAttribute(of=MapAttribute, attr_name='i', default=list)
+
+    number_index = ExampleIndex()
+
+
+class ExampleSafeUpdateModel(BaseSafeUpdateModel):
+    class Meta:
+        table_name = 'ExampleSafeUpdate'
+        region = 'us-west-1'
+
+    key = UnicodeAttribute(hash_key=True, attr_name='k')
+
+
+def test_convert_comparison():
+    assert ConditionConverter.convert(ExampleModel.key == 'one') == {
+        'k': 'one'
+    }
+    assert ConditionConverter.convert(ExampleModel.number > 1) == {
+        'n': {'$gt': 1}
+    }
+    assert ConditionConverter.convert(ExampleModel.number <= 1) == {
+        'n': {'$lte': 1}
+    }
+    assert ConditionConverter.convert(ExampleModel.key != 'one') == {
+        'k': {'$ne': 'one'}
+    }
+    assert ConditionConverter.convert(
+        ExampleModel.number.between(1, 2)
+    ) == {'n': {'$gte': 1, '$lte': 2}}
+
+
+def test_convert_logical():
+    cond = (ExampleModel.key == 'one') & ((ExampleModel.number < 1) |
+                                          ~ExampleModel.sort.exists())
+    assert ConditionConverter.convert(cond) == {
+        '$and': [
+            {'k': 'one'},
+            {'$or': [
+                {'n': {'$lt': 1}},
+                {'$nor': [{'s': {'$exists': True}}]}
+            ]}
+        ]
+    }
+
+
+def test_convert_in():
+    assert ConditionConverter.convert(
+        ExampleModel.key.is_in('one', 'two')
+    ) == {'k': {'$in': ['one', 'two']}}
+
+
+def test_convert_regex_escaped():
+    assert ConditionConverter.convert(
+        ExampleModel.key.startswith('a.b*')
+    ) == {'k': {'$regex': Regex(r'^a\.b\*')}}
+    assert ConditionConverter.convert(
+        ExampleModel.key.contains('(x)')
+    ) == {'k': {'$regex': Regex(r'\(x\)')}}
+
+
+def test_convert_nested_path():
+    assert ConditionConverter.convert(
+        ExampleModel.items[1]['inner'].does_not_exist()
+    ) == {'i.1.inner': {'$exists': False}}
+
+
+def test_path_to_raw():
+    path_to_raw = _PynamoDBExpressionsConverter.path_to_raw
+    assert path_to_raw(Path(ExampleModel.key)) == 'k'
+    assert path_to_raw(ExampleModel.items[12]['inner']) == 'i.12.inner'
+    assert path_to_raw(ExampleModel.items[1]['inner'][20]) == 'i.1.inner.20'
+
+
+def test_preprocess():
+    preprocess = _PynamoDBExpressionsConverter._preprocess
+    assert preprocess(Decimal('1.5')) == 1.5
+    assert preprocess('str') == 'str'
+    assert preprocess({
+        'n': Decimal('1'),
+        'l': [Decimal('2'), {'n': Decimal('3'), 's': 'str'}, [Decimal('4')]],
+        'null': None
+    }) == {'n': 1.0, 'l': [2.0, {'n': 3.0, 's': 'str'}, [4.0]], 'null': None}
+
+
+def test_convert_handler_overridden():
+    class Converter(ConditionConverter):
+        @classmethod
+        def _equals(cls, condition):
+            return {'overridden': True}
+
+    assert Converter.convert(
+        (ExampleModel.key == 'one') | (ExampleModel.number > 1)
+    ) == {'$or': [{'overridden': True}, {'n': {'$gt': 1}}]}
+    assert ConditionConverter._or(
+        (ExampleModel.key == 'one') | (ExampleModel.key == 'two')
+    ) == {'$or': [{'k': 'one'}, {'k': 'two'}]}
+
+
+def test_convert_not_supported():
+    with pytest.raises(NotImplementedError):
+        ConditionConverter.convert(ExampleModel.key.is_type())
+
+
+@pytest.fixture
+def collection() -> MagicMock:
+    return MagicMock()
+
+
+@pytest.fixture
+def adapter(collection) -> PynamoDBToPyMongoAdapter:
+    connection = MagicMock()
+    connection.collection.return_value = collection
+    connection.decode_keys.side_effect = lambda x: x
+    connection.encode_keys.side_effect = lambda x: x
+    return PynamoDBToPyMongoAdapter(connection)
+
+
+def test_update_merges_actions(adapter, collection):
+    collection.find_one_and_update.return_value = None
+    item = ExampleModel(key='key', sort='sort')
+    adapter.update(item, actions=[
+        ExampleModel.number.set(1),
+        ExampleModel.items.set([]),
+        ExampleModel.sort.remove()
+    ])
+    kwargs = collection.find_one_and_update.call_args.kwargs
+    assert kwargs['filter'] == {'k': 'key', 's': 'sort'}
+    assert kwargs['projection'] == {'k': 1, 's': 1, 'n': 1, 'i': 1}
+    assert kwargs['update'] == {
+        '$set': {'n': 1, 'i': []},
+        '$unset': {'s': ''}
+    }
+
+
+def test_get_nullable(adapter, collection):
+    collection.find_one.return_value = {'k': 'key', 's': 'sort', 'n': 1}
+    item = adapter.get_nullable(ExampleModel, 'key', 'sort')
+    assert collection.find_one.call_args.args[0] == {'k': 'key', 's': 'sort'}
+    assert item.key == 'key' and item.sort == 'sort' and item.number == 1
+
+    collection.find_one.return_value = None
+    assert adapter.get_nullable(ExampleModel, 'key', 'sort') is None
+
+    collection.find_one.return_value = {'k': 'key', 'n': 1}
+    item = adapter.get_nullable(ExampleModel, 'key', 'sort',
+                                attributes_to_get=[ExampleModel.key])
+    assert collection.find_one.call_args.args[1] == {'k': 1}
+    assert item.key == 'key' and item.number is None
+
+
+def test_query_projection(adapter, collection):
+    adapter.query(ExampleModel, 'key',
+                  attributes_to_get=[ExampleModel.number, 's'])
+    assert collection.find.call_args.args == ({'k': 'key'}, {'n': 1, 's': 1})
+
+    adapter.scan(ExampleModel)
+    assert collection.find.call_args.args == (
+        {}, {'k': 1, 's': 1, 'n': 1, 'i': 1}
+    )
+
+    adapter.scan(ExampleSafeUpdateModel, attributes_to_get=['k'])
+    assert collection.find.call_args.args == ({}, None)
+
+
+def test_batch_write_unordered(adapter, collection):
+    with adapter.batch_write(ExampleModel) as batch:
+        batch.save(ExampleModel(key='one', sort='sort'))
+        batch.save(ExampleModel(key='two', sort='sort'))
+    requests = collection.bulk_write.call_args.args[0]
+    assert len(requests) == 2
+    assert collection.bulk_write.call_args.kwargs == {'ordered': False}
+
+
+def test_batch_write_ordered_on_repeated_key(adapter, collection):
+    item = ExampleModel(key='one', sort='sort')
+    with adapter.batch_write(ExampleModel) as batch:
+        batch.save(item)
+        batch.delete(item)
+    assert collection.bulk_write.call_args.kwargs == {'ordered': True}
+
+    with adapter.batch_write(ExampleModel) as batch:
+        batch.save(item)
+    assert collection.bulk_write.call_args.kwargs == {'ordered': False}
+
+
+def test_batch_write_flushes(adapter, collection, monkeypatch):
+    monkeypatch.setenv('MODULAR_SDK_MONGO_BATCH_SIZE', '2')
+    with adapter.batch_write(ExampleModel) as batch:
+        for i in range(5):
+            batch.save(ExampleModel(key=str(i), sort='sort'))
+        assert collection.bulk_write.call_count == 2
+    assert collection.bulk_write.call_count == 3
+    assert len(collection.bulk_write.call_args.args[0]) == 1
+
+
+def test_batch_get_query(adapter, collection):
+    collection.find.return_value = []
+    adapter.batch_get(ExampleModel, ['one', 'two'])
+    assert collection.find.call_args.args[0] == {'k': {'$in': ['one', 'two']}}
+
+    adapter.batch_get(ExampleModel, [('one', 'a'), ('one', 'b')])
+    assert collection.find.call_args.args[0] == {
+        'k': 'one', 's': {'$in': ['a', 'b']}
+    }
+
+    adapter.batch_get(ExampleModel, [('one', 'a'), ('two', 'b')])
+    assert collection.find.call_args.args[0] == {
+        '$or': [{'k': 'one', 's': 'a'}, {'k': 'two', 's': 'b'}]
+    }
+
+
+def test_index_query_and_count(adapter, collection):
+    adapter.query(ExampleIndex, 1, scan_index_forward=False)
+    assert collection.find.call_args.args[0] == {'n': 1}
+    collection.find().limit().skip().sort.assert_called_with('k', -1)
+
+    adapter.query(ExampleModel, 1, index_name='ExampleIndex')
+    assert collection.find.call_args.args[0] == {'n': 1}
+
+    adapter.count(ExampleModel, 1, index_name='ExampleIndex')
+    assert collection.count_documents.call_args.args[0] == {'n': 1}
+
+
+def test_count(adapter, collection):
+    collection.estimated_document_count.return_value = 10
+    assert adapter.count(ExampleModel) == 10
+    collection.count_documents.assert_not_called()
+
+    adapter.count(ExampleModel, 'key', limit=5)
+    collection.count_documents.assert_called_with({'k': 'key'}, limit=5)
+
+    adapter.count(ExampleModel, filter_condition=ExampleModel.number > 1)
+    collection.count_documents.assert_called_with({'n': {'$gt': 1}})
+
+
+def test_result_last_evaluated_key():
+    result = Result(iter(range(5)), _evaluated_key=10, page_size=15)
+    assert next(result) == 0
+    assert result.last_evaluated_key == 11
+    assert list(result) == [1, 2, 3, 4]
+    assert result.last_evaluated_key is None
+    assert list(Result(iter(range(2)))) == [0, 1]
+
+
+def test_query_counts_lazily(adapter, collection):
+    collection.count_documents.return_value = 3
+    collection.find().limit().skip().sort.return_value = iter([{'k': 'key'}])
+    result = adapter.query(ExampleModel, 'key', limit=1)
+    assert [item.key for item in result] == ['key']
+    collection.count_documents.assert_not_called()
+    assert result.last_evaluated_key == 1
+    collection.count_documents.assert_called_once_with({'k': 'key'})
+
+
+def test_save_sets_mongo_id(adapter, collection):
+    collection.replace_one.return_value.upserted_id = 'id'
+    item = ExampleModel(key='key', sort='sort', number=1)
+    adapter.save(item)
+    assert collection.replace_one.call_args.args == (
+        {'k': 'key', 's': 'sort'}, {'k': 'key', 's': 'sort', 'n': 1, 'i': []}
+    )
+    assert item.mongo_id == 'id'
+
+
+def test_batch_get_chunks(adapter, collection, monkeypatch):
+    monkeypatch.setattr(adapter, 'batch_get_size', 2)
+    collection.find.return_value = []
+    adapter.batch_get(ExampleModel, (key for key in 'abc'))
+    assert [c.args[0] for c in collection.find.call_args_list] == [
+        {'k': {'$in': ['a', 'b']}}, {'k': {'$in': ['c']}}
+    ]
+    assert adapter.batch_get(ExampleModel, []) == []
@@ -0,0 +1,66 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from modular_sdk.models.setting import Setting
+
+
+@pytest.fixture
+def handler(monkeypatch) -> MagicMock:
+    monkeypatch.setenv('modular_service_mode', 'docker')
+    Setting.reset_cache()
+    handler = MagicMock()
+    with patch.object(Setting, 'mongodb_handler', return_value=handler):
+        yield handler
+    Setting.reset_cache()
+
+
+def test_get_nullable_cached(handler):
+    handler.get_nullable.return_value = None
+    assert Setting.get_nullable('KEY') is None
+    assert Setting.get_nullable('KEY') is None
+    assert handler.get_nullable.call_count == 2  # misses are not cached
+
+    handler.get_nullable.return_value = Setting(name='KEY', value={'a': [1]})
+    item = Setting.get_nullable('KEY')
+    assert item.value == {'a': [1]}
+    item.value['a'].append(2)  # not saved, must not leak to other callers
+    assert Setting.get_nullable('KEY').value == {'a': [1]}
+    assert handler.get_nullable.call_count == 3
+
+
+def test_get_nullable_after_save(handler):
+    handler.get_nullable.return_value = Setting(name='KEY', value=1)
+    assert Setting.get_nullable('KEY').value == 1
+
+    item = Setting(name='KEY', value=2)
+    handler.get_nullable.return_value = item
+    item.save()
+    handler.save.assert_called_once_with(model_instance=item)
+    assert Setting.get_nullable('KEY').value == 2
+
+    handler.get_nullable.return_value = Setting(name='KEY', value=3)
+    handler.delete.side_effect = ValueError
+    with pytest.raises(ValueError):
+        item.delete()
+    assert Setting.get_nullable('KEY').value == 3  # dropped on failure too
+
+
+def test_get_nullable_write_during_read(handler):
+    def read_old_then_save(*args, **kwargs):
+        handler.get_nullable.side_effect = None
+        handler.get_nullable.return_value = Setting(name='KEY', value=2)
+        Setting(name='KEY', value=2).save()  # concurrent write
+        return Setting(name='KEY', value=1)
+
+    handler.get_nullable.side_effect = read_old_then_save
+    assert Setting.get_nullable('KEY').value == 1
+    assert Setting.get_nullable('KEY').value == 2  # old value not cached
+
+
+def test_get_nullable_cache_disabled(handler, monkeypatch):
+    monkeypatch.setenv('MODULAR_SDK_SETTINGS_CACHE_TTL_SECONDS', '0')
+    handler.get_nullable.return_value = Setting(name='KEY', value=1)
+    Setting.get_nullable('KEY')
+    Setting.get_nullable('KEY')
+    assert handler.get_nullable.call_count == 2
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta, timezone
+
+from modular_sdk.commons.time_helper import utc_datetime, utc_iso
+
+
+def test_utc_datetime():
+    for string in ('2024-01-01T10:00:00Z', '2024-01-01T10:00:00+00:00',
+                   '2024-01-01T12:00:00+02:00'):
+        obj = utc_datetime(string)
+        assert obj == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
+        assert obj.tzinfo is timezone.utc
+    assert utc_datetime().tzinfo is timezone.utc
+
+
+def test_utc_iso():
+    assert utc_iso(datetime(2024, 1, 1, tzinfo=timezone.utc)) == \
+           '2024-01-01T00:00:00Z'
+    assert utc_iso(utc_datetime('2024-01-01T00:00:00Z')) == \
+           '2024-01-01T00:00:00Z'
+    assert utc_iso(datetime(2024, 1, 1, 2, tzinfo=timezone(
+        timedelta(hours=2)))) == '2024-01-01T00:00:00Z'
+    assert utc_iso().endswith('Z')
@@ -5,6 +5,7 @@ import gzip
 import pytest
 
 from modular_sdk.commons import dict_without, build_payload, build_message, build_secure_message
+from modular_sdk.commons.helpers import replace_keys_in_dict
 
 
 @pytest.fixture
@@ -106,4 +107,16 @@ def test_build_message():
 
 def test_build_secure_message():
     # weird thing
-    assert build_secure_message('id', 'name', {'key': 'value', 'key1': 'value1'}, ['key'], True) == [{'id': 'id', 'type': None, 'params': {'key': '*****', 'key1': 'value1', 'type': 'name'}}]
\ No newline at end of file
+    assert build_secure_message('id', 'name', {'key': 'value', 'key1': 'value1'}, ['key'], True) == [{'id': 'id', 'type': None, 'params': {'key': '*****', 'key1': 'value1', 'type': 'name'}}]
+
+
+def test_replace_keys_in_dict():
+    assert replace_keys_in_dict({
+        'a.b': 1,
+        'c': {'d.e': {'f.g.h': 'i.j'}},
+        'l': [{'m.n': 1}]
+    }, '.', '|#|') == {
+        'a|#|b': 1,
+        'c': {'d|#|e': {'f|#|g|#|h': 'i.j'}},
+        'l': [{'m.n': 1}]
+    }